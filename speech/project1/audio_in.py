@@ -1,4 +1,5 @@
-from queue import Queue
+from logging import debug, warning
+from queue import Empty, Full, Queue
 from typing import Mapping
 
 from pyaudio import PyAudio, paContinue
@@ -13,12 +14,20 @@ from speech.project1 import (
 
 N_FRAME_PER_CHUNK = SAMPLING_RATE * CHUNK_MS // MS_IN_SECOND
 """Number of frames per audio sample chunk."""
+MAX_QUEUED_CHUNKS = 50
+"""Maximum number of chunks waiting in `AudioIn.audio_queue`, bounding the
+recorded audio latency to 1 s at 20 ms chunks. Newer chunks are dropped when
+the queue is full."""
 
 
 class AudioIn:
     def __init__(self):
         self.py_audio = PyAudio()
-        self.audio_queue: Queue[tuple[bytes, int]] = Queue()
+        self.audio_queue: Queue[tuple[bytes, int] | None] = Queue(
+            maxsize=MAX_QUEUED_CHUNKS
+        )
+        self.n_dropped = 0
+        self.dropping = False
         self.stream = self.py_audio.open(
             format=RESOLUTION_FORMAT,
             channels=N_CHANNEL,
@@ -36,19 +45,35 @@ class AudioIn:
         status: int,  # pyright: ignore reportUnusedVariable
     ):
         """A callback for `PyAudio.open`, which sends input audio data to
-        `self.audio_queue`."""
+        `self.audio_queue`, or drops it if the consumer falls behind."""
         assert in_data is not None
-        self.audio_queue.put((in_data, n_frame))
+        try:
+            self.audio_queue.put_nowait((in_data, n_frame))
+        except Full:
+            self.n_dropped += 1
+            if not self.dropping:
+                self.dropping = True
+                debug("Audio queue full, dropping chunks.")
+        else:
+            if self.dropping:
+                self.dropping = False
+                debug("Audio queue has room after %d dropped chunks.", self.n_dropped)
         return None, paContinue
 
     def discard_first_at_least(self, n_discard=5):
         """Discard first `n_discard` samples in `self.audio_queue` to avoid
-        initial unstable samples. Then, discard all previous samples."""
+        initial unstable samples. Then, discard all previous samples, including
+        the count of chunks dropped while nobody was consuming them."""
         if self.audio_queue.qsize() < n_discard:
             for _ in range(n_discard):
                 self.audio_queue.get(timeout=0.1)
-        with self.audio_queue.mutex:
-            self.audio_queue.queue.clear()
+        try:
+            while True:
+                self.audio_queue.get_nowait()
+        except Empty:
+            pass
+        self.n_dropped = 0
+        self.dropping = False
 
     def __enter__(self):
         return self
@@ -56,3 +81,16 @@ class AudioIn:
     def __exit__(self, *_):
         self.stream.close()
         self.py_audio.terminate()
+        if self.n_dropped > 0:
+            warning("Dropped %d audio chunks the consumer missed.", self.n_dropped)
+        # Wake up consumers blocked on `self.audio_queue`: no more audio.
+        # The stream is closed, so making room cannot race with the callback.
+        while True:
+            try:
+                self.audio_queue.put_nowait(None)
+                break
+            except Full:
+                try:
+                    self.audio_queue.get_nowait()
+                except Empty:
+                    pass
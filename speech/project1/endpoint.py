@@ -1,3 +1,5 @@
+import math
+from collections import deque
 from logging import debug
 from queue import Queue
 from threading import Thread
@@ -21,25 +23,23 @@ class Endpointer:
     `write_queue` in a background thread until speech stops.
     Stopping condition: `MAX_PAUSE_MS` ms after speech stops."""
 
-    def __init__(
-        self, audio_in: AudioIn, write_queue: Queue[bytes | None], timeout=0.1
-    ):
+    def __init__(self, audio_in: AudioIn, write_queue: Queue[bytes | None]):
         self.audio_in = audio_in
         self.write_queue = write_queue
-        self.timeout = timeout
         self.classify_sample = get_classify_sample()
         self.off_time = 0
         self.started = False
         self.paused = False
-        self.pending_samples = b""
+        self.pending_samples: deque[bytes] = deque()
+        self.n_pending_bytes = 0
         self.thread = Thread(target=self.write_all, args=())
         self.thread.start()
 
     def write_all(self):
         """Write all audio sample to `self.write_queue`."""
         try:
-            while True:
-                data, _ = self.audio_in.audio_queue.get(timeout=self.timeout)
+            while (item := self.audio_in.audio_queue.get()) is not None:
+                data, _ = item
                 audio_array = np.frombuffer(data, dtype=np.int16)
                 is_speech = self.classify_sample(audio_array)
 
@@ -47,11 +47,11 @@ class Endpointer:
                     if is_speech:
                         self.started = True
                         # Backtrack previous sample before recording starts.
-                        self.write_queue.put(self.pending_samples[-SIZE_OF_BACKTRACK:])
-                        self.pending_samples = b""
+                        self.write_queue.put(self.take_pending()[-SIZE_OF_BACKTRACK:])
                         self.write_queue.put(data)
                     else:
-                        self.pending_samples += data
+                        self.add_pending(data)
+                        self.trim_pending(SIZE_OF_BACKTRACK)
                 else:
                     if is_speech:
                         self.off_time = 0
@@ -59,18 +59,38 @@ class Endpointer:
                             print("Writing samples received during pause.")
                             self.paused = False
                             # Backtrack previous sample during pause.
-                            self.write_queue.put(self.pending_samples)
-                            self.pending_samples = b""
+                            self.write_queue.put(self.take_pending())
                         self.write_queue.put(data)
                     else:
                         self.paused = True
                         self.off_time += CHUNK_MS
                         if self.off_time > MAX_PAUSE_MS:
                             break
-                        self.pending_samples += data
+                        self.add_pending(data)
         finally:
             self.write_queue.put(None)
 
+    def add_pending(self, data: bytes):
+        """Hold `data` back until it is known whether it should be written."""
+        self.pending_samples.append(data)
+        self.n_pending_bytes += len(data)
+
+    def trim_pending(self, n_keep: int):
+        """Drop the oldest pending chunks not needed to keep the last `n_keep`
+        bytes."""
+        while (
+            self.pending_samples
+            and self.n_pending_bytes - len(self.pending_samples[0]) >= n_keep
+        ):
+            self.n_pending_bytes -= len(self.pending_samples.popleft())
+
+    def take_pending(self) -> bytes:
+        """Return all pending bytes and clear them."""
+        pending = b"".join(self.pending_samples)
+        self.pending_samples.clear()
+        self.n_pending_bytes = 0
+        return pending
+
     def __del__(self):
         self.thread.join(timeout=0)
 
@@ -94,8 +114,8 @@ def get_classify_sample():
     speech is considered to continue when the `level` energy is
     at least `CONTINUING_THRESHOLD_DB` higher than `background` energy and
     at least `STOPPING_THRESHOLD_DB` higher than `foreground` energy."""
-    level: np.float64 | None = None
-    background: np.float64 | None = None
+    level: float | None = None
+    background: float | None = None
     foreground = 0.0
     speaking = False
 
@@ -138,16 +158,27 @@ def get_classify_sample():
     return classify_frame
 
 
-def sample_decibel_energy(arr: NDArray[np.int16]) -> np.float64:
+def sample_decibel_energy(arr: NDArray[np.int16]) -> float:
     """Calculate the energy of an audio sample in decibel."""
-    arr = arr.astype(np.int64)  # avoid overflow
-    power = arr.dot(arr) / arr.size
-    return np.log10(power) * 10.0
+    floats = arr.astype(np.float32, copy=False)  # avoid overflow
+    power = float(floats @ floats) / floats.size
+    return 10.0 * math.log10(power) if power > 0.0 else -math.inf
+
+
+def frames_decibel_energy(frames: NDArray[np.int16]) -> NDArray[np.float32]:
+    """Calculate the energy in decibel of each row of `frames` at once."""
+    floats = frames.astype(np.float32, copy=False)  # avoid overflow
+    powers = np.einsum("ij,ij->i", floats, floats) / floats.shape[1]
+    with np.errstate(divide="ignore"):  # Silent frames are -inf dB.
+        return 10.0 * np.log10(powers)
 
 
 def adjust_conditionally_on_change(
     original, updated, adjustment_if_inc, adjustment_if_dec
 ):
-    """Adjust `original` based on whether `updated` increased from it."""
+    """Adjust `original` based on whether `updated` increased from it.
+    The adjustment is selected by the sign of the difference without branching."""
     diff = updated - original
-    return (adjustment_if_inc if diff > 0 else adjustment_if_dec) * diff + original
+    half_sum = 0.5 * (adjustment_if_inc + adjustment_if_dec)
+    half_gap = 0.5 * (adjustment_if_inc - adjustment_if_dec)
+    return (half_sum + math.copysign(1.0, diff) * half_gap) * diff + original
@@ -8,7 +8,12 @@ from threading import Thread
 import matplotlib.pyplot as plt
 import numpy as np
 
-from speech.project1 import N_CHANNEL, RESOLUTION_FORMAT, SAMPLING_RATE
+from speech.project1 import (
+    MS_IN_SECOND,
+    N_CHANNEL,
+    RESOLUTION_FORMAT,
+    SAMPLING_RATE,
+)
 from speech.project1.audio_in import AudioIn
 from speech.project1.endpoint import Endpointer
 
@@ -42,13 +47,33 @@ def audio_recording_thread(byte_queue: Queue[bytes | None], out_file_name: str):
         finally:
             write_queue.put(None)
             byte_queue.put(None)
-            writer_thread.join(timeout=0.1)
+            writer_thread.join()
+
+
+WRITE_BATCH_MS = 200
+"""Duration in milliseconds of audio collected before each write to file."""
 
 
 def frame_writing_thread(out_file: wave.Wave_write, byte_queue: Queue[bytes | None]):
-    """A thread that writes frames from `byte_queue` to `out_file`."""
+    """A thread that writes frames from `byte_queue` to `out_file`, in batches
+    of at least `WRITE_BATCH_MS` ms."""
+    batch_size = (
+        (SAMPLING_RATE * WRITE_BATCH_MS // MS_IN_SECOND)
+        * out_file.getsampwidth()
+        * N_CHANNEL
+    )
+    """Size of each write batch in bytes."""
+    out_chunks: list[bytes] = []
+    n_out_bytes = 0
     while data := byte_queue.get():
-        out_file.writeframes(data)
+        out_chunks.append(data)
+        n_out_bytes += len(data)
+        if n_out_bytes >= batch_size:
+            out_file.writeframes(b"".join(out_chunks))
+            out_chunks.clear()
+            n_out_bytes = 0
+    if out_chunks:
+        out_file.writeframes(b"".join(out_chunks))
 
 
 MAXIMUM_DRAWING_TIME = 10
@@ -7,7 +7,11 @@ import numpy as np
 
 from speech.project1 import open_wave_file
 from speech.project1.audio_in import N_FRAME_PER_CHUNK
-from speech.project1.endpoint import get_classify_sample
+from speech.project1.endpoint import (
+    frames_decibel_energy,
+    get_classify_sample,
+    sample_decibel_energy,
+)
 
 
 def process(my_list, classify_frame):
@@ -43,5 +47,13 @@ class TestAudio(unittest.TestCase):
 
         plt.savefig("plot.png")
 
+    def test_frames_decibel_energy(self):
+        frames = np.random.default_rng(0).integers(
+            -(1 << 15), 1 << 15, size=(8, N_FRAME_PER_CHUNK), dtype=np.int16
+        )
+        frames[3] = 0
+        expected = [sample_decibel_energy(frame) for frame in frames]
+        np.testing.assert_allclose(frames_decibel_energy(frames), expected, rtol=1e-5)
+
 
 unittest.main() if __name__ == "__main__" else None
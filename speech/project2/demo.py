@@ -64,19 +64,24 @@ def main():
     audio_thread.start()
 
     segmenter = Segmenter(SAMPLING_RATE * CHUNK_MS // MS_IN_SECOND)
-    mel_spectra = list(
-        np.array([], dtype=np.float32).reshape(n_filter_banks, 0)
-        for n_filter_banks in NS_FILTER_BANKS
-    )
+    mel_spectrum_columns: list[list[NDArray[np.float32]]] = [
+        [] for _ in NS_FILTER_BANKS
+    ]
     while (data := byte_queue.get()) is not None:
         audio_array = np.frombuffer(data, dtype=np.int16)
         segmenter.add_sample(pre_emphasis(audio_array))
         while (frame := segmenter.next()) is not None:
             for index, n_filter_banks in enumerate(NS_FILTER_BANKS):
                 mel_spectrum = mel_spectrum_from_frame(frame, n_filter_banks)
-                mel_spectra[index] = np.hstack(
-                    (mel_spectra[index], mel_spectrum[:, np.newaxis])
-                )
+                mel_spectrum_columns[index].append(mel_spectrum)
+    mel_spectra = [
+        (
+            np.stack(columns, axis=1)
+            if columns
+            else np.empty((n_filter_banks, 0), dtype=np.float32)
+        )
+        for columns, n_filter_banks in zip(mel_spectrum_columns, NS_FILTER_BANKS)
+    ]
     for mel_spectrum, n_filter_banks in zip(mel_spectra, NS_FILTER_BANKS):
         cep, _ = spec2cep(mel_spectrum, ncep=13)
         plot_audio(cep, mel_spectrum, out_plot_name, n_filter_banks)
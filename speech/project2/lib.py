@@ -6,6 +6,7 @@ import scipy
 from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 from matplotlib.figure import Figure
+from numba import njit
 from numpy.typing import NDArray
 from scipy import fft
 from scipy.signal import spectrogram
@@ -15,8 +16,22 @@ from speech.project1 import CHUNK_MS, MS_IN_SECOND, SAMPLING_RATE
 
 def pre_emphasis(signal: NDArray, alpha: float = 0.95) -> NDArray[np.float32]:
     """Apply pre-emphasis to the input signal."""
-    pre_emphasized_signal = signal.astype(np.float32, copy=True)
-    pre_emphasized_signal[1:] -= alpha * pre_emphasized_signal[:-1]
+    return pre_emphasis_kernel(signal, np.float32(alpha))
+
+
+@njit(cache=True, fastmath=True)
+def pre_emphasis_kernel(signal: NDArray, alpha: np.float32) -> NDArray[np.float32]:
+    """`y[n] = x[n] - alpha * x[n - 1]` in one pass, reading `signal` in its own
+    dtype and writing float32."""
+    n = signal.shape[0]
+    pre_emphasized_signal = np.empty(n, dtype=np.float32)
+    if n == 0:
+        return pre_emphasized_signal
+    pre_emphasized_signal[0] = signal[0]
+    for i in range(1, n):
+        pre_emphasized_signal[i] = np.float32(signal[i]) - alpha * np.float32(
+            signal[i - 1]
+        )
     return pre_emphasized_signal
 
 
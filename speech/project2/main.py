@@ -2,7 +2,9 @@
 Run as `python3 -m speech.project2.main`."""
 
 import os
+from concurrent.futures import ProcessPoolExecutor
 
+import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 
@@ -60,11 +62,15 @@ def plot_audio_file(number: str, i: int, n_filter_banks: int):
 
 
 def main():
-    for number in NUMBERS:
-        for i in range(4):
-            for n_filter_banks in NS_FILTER_BANKS:
-                plot_audio_file(number, i, n_filter_banks)
-                plt.close("all")
+    tasks = [
+        (number, i, n_filter_banks)
+        for number in NUMBERS
+        for i in range(4)
+        for n_filter_banks in NS_FILTER_BANKS
+    ]
+    # Plots are only saved, and each process gets its own non-GUI backend.
+    with ProcessPoolExecutor(initializer=matplotlib.use, initargs=("Agg",)) as executor:
+        list(executor.map(plot_audio_file, *zip(*tasks)))
 
 
 main() if __name__ == "__main__" else None
@@ -1,4 +1,4 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 from logging import debug
 
 import numpy as np
@@ -30,12 +30,11 @@ INF_FLOAT32 = np.float32(np.inf)
 
 
 class NodeCostFn(ABC):
-    """Returns node cost given input frame and template frame index."""
+    """Returns node costs of an input frame against every template frame."""
 
-    def __call__(
-        self, input_frame: NDArray[np.float32], template_frame_index: int
-    ) -> np.float32:
-        raise NotImplementedError(input_frame, template_frame_index)
+    @abstractmethod
+    def batch(self, input_frame: NDArray[np.float32]) -> NDArray[np.float32]:
+        raise NotImplementedError(input_frame)
 
 
 @cache_to_disk(30)
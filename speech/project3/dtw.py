@@ -2,6 +2,7 @@ from logging import debug
 from typing import Iterable
 
 import numpy as np
+from numba import njit
 from numpy.typing import NDArray
 
 from speech import T
@@ -15,6 +16,7 @@ def single_dtw_search(
 ) -> list[np.float32]:
     """Conduct a single dynamic time warping search on given `template` and
     `input_frames`. Return the total cost if the search is done."""
+    assert input_frames.shape[1:] == template.shape[1:], input_frames.shape
     node_cost_fn = DTWEnuclideanNodeCostFn(template=template)
     costs = DTWCosts(len(template), node_cost_fn)
     finish_costs = []
@@ -28,73 +30,118 @@ def time_sync_dtw_search(
     templates: Iterable[tuple[NDArray[np.float32], T]],
     input_frames: NDArray[np.float32],
     pruning_threshold=BEST_PRUNING_THRESHOLD,
+    total_cost_margin=0.0,
 ) -> tuple[np.float32, T | None]:
     """Conduct time-synchronous dynamic time warping search on given `templates`
     and `input_frames`. Return the minimum cost found, and the corresponding
-    prediction if the search is done."""
+    prediction if the search is done.
+    Templates whose costs are `pruning_threshold` above the round's minimum cost
+    are pruned, like `beam_width` in `match_sequence_against_hmm_states`.
+    Templates whose costs are `total_cost_margin` above the best total cost
+    found so far are also pruned. Costs never decrease, so a
+    `total_cost_margin` of 0 only prunes templates that cannot beat the best
+    total cost."""
+    templates = list(templates)
+    if not templates:
+        return INF_FLOAT32, None
+    assert all(
+        input_frames.shape[1:] == template.shape[1:] for template, _ in templates
+    ), input_frames.shape
+    # Node costs come from the stacked templates below, not the `DTWCosts`.
     costs_and_predictions = [
-        (
-            DTWCosts(len(template), DTWEnuclideanNodeCostFn(template=template)),
-            prediction,
-        )
-        for template, prediction in templates
+        (DTWCosts(len(template)), prediction) for template, prediction in templates
     ]
-    pruned_list = [False for _ in templates]
+    active_indexes = list(range(len(templates)))
+    """Indexes of templates not pruned yet."""
+    stacked = StackedTemplates([template for template, _ in templates])
 
     global_min_cost = INF_FLOAT32
     global_best_prediction = None
 
     for input_frame in input_frames:
-        round_min_cost = INF_FLOAT32
-        for index, ((costs, prediction), pruned) in enumerate(
-            zip(costs_and_predictions, pruned_list)
-        ):
-            if pruned:
-                continue
+        stacked_node_costs = stacked.node_costs(input_frame)
 
+        round_min_cost = INF_FLOAT32
+        for index, template_slice in zip(active_indexes, stacked.template_slices):
+            costs, prediction = costs_and_predictions[index]
+            node_costs = stacked_node_costs[template_slice]
             if (
-                total_cost := costs.add_input(input_frame)
+                total_cost := costs.add_node_costs(node_costs)
             ) and total_cost < global_min_cost:
                 global_min_cost = total_cost
                 global_best_prediction = prediction
                 debug(f"Got new best total cost {total_cost:.2f} for `{prediction}`.")
-            round_min_cost = min(round_min_cost, costs.min_cost)
+            if costs.min_cost < round_min_cost:
+                round_min_cost = costs.min_cost
 
         past_round_threshold = round_min_cost + pruning_threshold
-        for index, ((costs, prediction), pruned) in enumerate(
-            zip(costs_and_predictions, pruned_list)
-        ):
-            if pruned:
-                continue
+        total_cost_threshold = global_min_cost + total_cost_margin
+        still_active_indexes = []
+        for index in active_indexes:
+            costs, prediction = costs_and_predictions[index]
             if costs.min_cost > past_round_threshold:
-                pruned_list[index] = True
                 debug(f"Pruned template {index} for `{prediction}`.")
+            elif costs.min_cost > total_cost_threshold:
+                debug(f"Pruned template {index} for `{prediction}` by total cost.")
             else:
                 costs.prune(past_round_threshold)
+                still_active_indexes.append(index)
+        if not still_active_indexes:
+            break
+        if len(still_active_indexes) < len(active_indexes):
+            # Only compute node costs for templates still active.
+            stacked = StackedTemplates(
+                [templates[index][0] for index in still_active_indexes]
+            )
+        active_indexes = still_active_indexes
     return global_min_cost, global_best_prediction
 
 
+class StackedTemplates:
+    """Templates stacked into one float32 matrix so node costs of an input frame
+    against all their frames take one pass."""
+
+    def __init__(self, templates: list[NDArray[np.float32]]):
+        template_lens = [len(template) for template in templates]
+        template_ends = np.cumsum(template_lens).tolist()
+        self.template_slices = [
+            slice(end - length, end)
+            for end, length in zip(template_ends, template_lens)
+        ]
+        """Slice of each template's frames in the stacked matrix."""
+        self.templates = np.concatenate(templates, dtype=np.float32)
+        self.norms_sq = squared_row_norms(self.templates)
+        self.template_lens = np.repeat(np.float32(template_lens), template_lens)
+
+    def node_costs(self, input_frame: NDArray[np.float32]) -> NDArray[np.float32]:
+        distances = euclidean_distances_to_rows(
+            self.templates, self.norms_sq, input_frame
+        )
+        return distances / self.template_lens
+
+
 class DTWEnuclideanNodeCostFn(NodeCostFn):
     def __init__(self, template: NDArray[np.float32]):
-        self.template = template
+        self.template = np.ascontiguousarray(template, dtype=np.float32)
         self.template_len = len(template)
+        self.template_norms_sq = squared_row_norms(self.template)
 
-    def __call__(
-        self, input_frame: NDArray[np.float32], template_frame_index: int
-    ) -> np.float32:
-        distance = euclidean_distance(input_frame, self.template[template_frame_index])
-        return distance / self.template_len
+    def batch(self, input_frame: NDArray[np.float32]) -> NDArray[np.float32]:
+        distances = euclidean_distances_to_rows(
+            self.template, self.template_norms_sq, input_frame
+        )
+        return distances / self.template_len
 
 
 class DTWCosts:
     """Growable costs matrix for dynamic time warping."""
 
     template_len: int
-    node_cost: NodeCostFn
+    node_cost: NodeCostFn | None
     cost_columns: list[NDArray[np.float32]]
     min_cost: np.float32
 
-    def __init__(self, template_len: int, node_cost: NodeCostFn):
+    def __init__(self, template_len: int, node_cost: NodeCostFn | None = None):
         self.template_len = template_len
         self.node_cost = node_cost
         self.cost_columns = []
@@ -107,35 +154,25 @@ class DTWCosts:
 
     def add_input(self, input_frame: NDArray[np.float32]) -> np.float32 | None:
         """Add an input frame and return the total cost if the end of the
-        template is reached."""
-        assert len(input_frame) == 39, input_frame.shape
+        template is reached. Requires `self.node_cost`."""
+        assert self.node_cost is not None
+        return self.add_node_costs(self.node_cost.batch(input_frame))
+
+    def add_node_costs(self, node_costs: NDArray[np.float32]) -> np.float32 | None:
+        """Add the node costs of an input frame against every template frame and
+        return the total cost if the end of the template is reached."""
         if len(self.cost_columns) == 0:  # First input frame.
             first_column = self.empty_column()
-            first_cost = self.node_cost(input_frame, 0)
-            first_column[0] = first_cost
+            first_column[0] = node_costs[0]
             self.cost_columns.append(first_column)
             return None
 
         last_column = self.cost_columns[-1]
         r"""P_{\_, j-1}"""
 
-        new_column = self.empty_column()
-        min_cost = INF_FLOAT32
-        for template_index in range(self.template_len):
-            safe_template_index_lower = max(template_index - 2, 0)
-            min_prev_cost = np.min(
-                last_column[safe_template_index_lower : template_index + 1]
-            )
-            r"""\min(P_{i-2, j-1}, P_{i-1, j-1}, P_{i, j-1})"""
-
-            if min_prev_cost < INF_FLOAT32:
-                current_node_cost = self.node_cost(input_frame, template_index)
-                """C_{i,j}"""
-                current_cost = min_prev_cost + current_node_cost
-                new_column[template_index] = current_cost
-                min_cost = min(min_cost, current_cost)
+        new_column = dtw_column(last_column, node_costs, INF_FLOAT32)
         self.cost_columns.append(new_column)
-        self.min_cost = min_cost
+        self.min_cost = new_column.min()
 
         return total_cost if (total_cost := new_column[-1]) < INF_FLOAT32 else None
 
@@ -148,5 +185,44 @@ class DTWCosts:
         last_column[last_column > threshold] = INF_FLOAT32
 
 
-def euclidean_distance(x: NDArray[np.float32], y: NDArray[np.float32]) -> np.float32:
-    return np.linalg.norm(x - y)
+FASTMATH_WITH_INF = {"nsz", "arcp", "contract", "afn", "reassoc"}
+"""Numba fast-math flags, without `ninf` and `nnan`, since `INF_FLOAT32` marks
+unreachable costs."""
+
+
+@njit(cache=True, fastmath=FASTMATH_WITH_INF)
+def dtw_column(
+    last_column: NDArray[np.float32], node_costs: NDArray[np.float32], inf: np.float32
+) -> NDArray[np.float32]:
+    r"""Next costs column
+    P_{i, j} = \min(P_{i-2, j-1}, P_{i-1, j-1}, P_{i, j-1}) + C_{i, j}
+    given the last costs column `last_column` P_{\_, j-1} and the node costs
+    `node_costs` C_{\_, j}."""
+    n = last_column.shape[0]
+    new_column = np.full(n, inf, dtype=np.float32)
+    for i in range(n):
+        min_prev_cost = last_column[i]
+        if i >= 1 and last_column[i - 1] < min_prev_cost:
+            min_prev_cost = last_column[i - 1]
+        if i >= 2 and last_column[i - 2] < min_prev_cost:
+            min_prev_cost = last_column[i - 2]
+        if min_prev_cost < inf:
+            new_column[i] = min_prev_cost + node_costs[i]
+    return new_column
+
+
+def squared_row_norms(matrix: NDArray[np.float32]) -> NDArray[np.float32]:
+    return np.einsum("ij,ij->i", matrix, matrix)
+
+
+def euclidean_distances_to_rows(
+    matrix: NDArray[np.float32],
+    matrix_norms_sq: NDArray[np.float32],
+    x: NDArray[np.float32],
+) -> NDArray[np.float32]:
+    """Euclidean distances from `x` to each row of `matrix`, given
+    `matrix_norms_sq` from `squared_row_norms(matrix)`. Uses
+    ‖a - b‖² = ‖a‖² + ‖b‖² - 2a·b so it takes a single matrix-vector product."""
+    x = x.astype(np.float32, copy=False)
+    distances_sq = matrix_norms_sq + (x @ x) - 2.0 * (matrix @ x)
+    return np.sqrt(np.maximum(distances_sq, 0.0))
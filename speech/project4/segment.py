@@ -1,6 +1,10 @@
 """Run as `python3 -m speech.project4.segment`."""
 
+from functools import lru_cache
+
 import numpy as np
+from numba import njit
+from numpy.typing import NDArray
 
 from speech.project4 import DATA_DIR, read_lines_stripped, write_split_lines
 from speech.project4.correct_story import correct_story_lines_stripped
@@ -12,35 +16,35 @@ def segment_text(text, dictionary):
     n = len(text)
     dp = np.full((n, n), 0)
     prev = np.full((n, n), -1)
+    dictionary_codes = [char_codes(w) for w in dictionary]
+
+    @lru_cache(maxsize=None)
+    def nearest_distance(word: str) -> int:
+        """Distance from `word` to its closest dictionary word."""
+        word_codes = char_codes(word)
+        return min(
+            levenshtein_distance_codes(w_codes, word_codes)
+            for w_codes in dictionary_codes
+        )
 
     for i in range(n):
         word = text[: i + 1]
         if word not in dictionary:
-            min_distance = float("inf")
-            for w in dictionary:
-                distance = levenshtein_distance(w, word)
-                if distance < min_distance:
-                    min_distance = distance
-            dp[0][i] = min_distance
+            dp[0][i] = nearest_distance(word)
             prev[0][i] = 0
 
     for i in range(1, n):
+        prev_costs = dp[:i, i - 1]
+        min_prev_cost = np.min(prev_costs)
+        min_prev_index = np.argmin(prev_costs)
         for j in range(i, n):
             word = text[i : j + 1]
             if word in dictionary:
                 score = 0
-                dp[i][j] = np.min(dp[:i, i - 1]) + score
-                prev[i][j] = np.argmin(dp[:i, i - 1])
             else:
-                min_distance = float("inf")
-                closest_word = None
-                for w in dictionary:
-                    distance = levenshtein_distance(w, word)
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_word = w
-                dp[i][j] = np.min(dp[:i, i - 1]) + min_distance
-                prev[i][j] = np.argmin(dp[:i, i - 1])
+                score = nearest_distance(word)
+            dp[i][j] = min_prev_cost + score
+            prev[i][j] = min_prev_index
 
     # print(np.array(dp))
     # print(np.array(prev))
@@ -58,24 +62,35 @@ def segment_text(text, dictionary):
     return result
 
 
-def levenshtein_distance(word1, word2):
-    m, n = len(word1), len(word2)
-    dp = np.zeros((m + 1, n + 1))
+def levenshtein_distance(word1: str, word2: str) -> int:
+    return levenshtein_distance_codes(char_codes(word1), char_codes(word2))
+
+
+def char_codes(word: str) -> NDArray[np.uint32]:
+    """Unicode code points of each character in `word`."""
+    return np.frombuffer(word.encode("utf-32-le"), dtype=np.uint32)
 
-    for i in range(m + 1):
-        dp[i][0] = i
 
-    for j in range(n + 1):
-        dp[0][j] = j
+@njit(cache=True)
+def levenshtein_distance_codes(
+    codes1: NDArray[np.uint32], codes2: NDArray[np.uint32]
+) -> int:
+    """Levenshtein distance between two words given as `char_codes`, keeping
+    only the last row of the distance matrix."""
+    m, n = codes1.shape[0], codes2.shape[0]
+    prev_row = np.arange(n + 1, dtype=np.int32)
+    row = np.empty(n + 1, dtype=np.int32)
 
     for i in range(1, m + 1):
+        row[0] = i
         for j in range(1, n + 1):
-            if word1[i - 1] == word2[j - 1]:
-                dp[i][j] = dp[i - 1][j - 1]
+            if codes1[i - 1] == codes2[j - 1]:
+                row[j] = prev_row[j - 1]
             else:
-                dp[i][j] = min(dp[i - 1][j], dp[i][j - 1], dp[i - 1][j - 1]) + 1
+                row[j] = min(prev_row[j], row[j - 1], prev_row[j - 1]) + 1
+        prev_row, row = row, prev_row
 
-    return dp[m][n]
+    return prev_row[n]
 
 
 def longest_common_subsequence_diff(word_list0: list[str], word_list1: list[str]):
@@ -34,7 +34,9 @@ def record_audio(out_file_name: str):
             n_samples = 0
 
             while n_samples < MAX_PAUSE_MS * SAMPLING_RATE // MS_IN_SECOND:
-                data, n_frame = audio_in.audio_queue.get()
+                if (item := audio_in.audio_queue.get()) is None:
+                    break
+                data, n_frame = item
                 n_samples += n_frame
                 write_queue.put(data)
             print("Stopping recording.")
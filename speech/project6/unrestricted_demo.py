@@ -2,6 +2,7 @@
 Run as `python3 -m speech.project6.unrestricted_demo`."""
 
 import argparse
+from io import BytesIO
 from queue import Queue
 from threading import Thread
 
@@ -33,9 +34,10 @@ def main() -> None:
     audio_thread = Thread(target=audio_recording_thread, args=(byte_queue, args.output))
     audio_thread.start()
 
-    full_input = np.array([], dtype=np.int16)
+    input_bytes = BytesIO()
     while (data := byte_queue.get()) is not None:
-        full_input = np.append(full_input, np.frombuffer(data, dtype=np.int16))
+        input_bytes.write(data)
+    full_input = np.frombuffer(input_bytes.getbuffer(), dtype=np.int16)
     input_mfcc = derive_cepstrum_velocities(mfcc_homebrew(full_input)[0])
     recognition_list = match_sequence_against_hmm_states(
         input_mfcc, non_emitting_states, emitting_states, beam_width=4000.0